@@ -1,8 +1,16 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, font
-from PIL import Image, ImageChops, ImageOps, ImageTk
+from PIL import Image, ImageChops, ImageOps, ImageSequence, ImageTk
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import math
 import os
+import queue
 import random
+import shutil
+import threading
+import time
 
 # --- Constants for Splitting/Scattering Function ---
 OUTPUT_SIZE = 3072  # 3 * 1024, ensures divisibility by SMALL_BLOCK_SIZE
@@ -23,6 +31,125 @@ NCM_BORDER_COLOR = "#D3D3D3" # Light gray border
 NCM_CANVAS_BG = "#EDEDED" # Slightly darker gray for preview canvas
 NCM_HOVER_BG = "#EAEAEA" # Light gray on hover
 
+# --- Constants for the Blend File Thumbnail List ---
+CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".pinhaotu_cache") # On-disk cache location
+THUMBNAIL_SIZE = 64 # Max thumbnail edge in pixels
+THUMBNAIL_ROW_HEIGHT = THUMBNAIL_SIZE + 12 # Height of one row in the thumbnail list
+THUMBNAIL_LIST_HEIGHT = 300 # Visible height of the thumbnail list
+THUMBNAIL_CACHE_DIR = os.path.join(CACHE_ROOT, "thumbnails") # One PNG per content hash
+THUMBNAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024 # Least recently used thumbnails are evicted above 64 MB
+
+# --- Constants for the Content-addressed Result Cache ---
+RESULT_CACHE_DIR = os.path.join(CACHE_ROOT, "results") # One sub-folder per cached result
+RESULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024 # Least recently used results are evicted above 2 GB
+RESULT_CACHE_VERSION = 1 # Bump when the output of splitting/blending changes for the same parameters
+RESULT_CACHE_STALE_SECONDS = 60 * 60 # Staging/encoding folders untouched for this long are leftovers of a crash
+
+# --- Constants for the Pre-flight Memory Planner ---
+PLANNER_RAM_SAFETY_FACTOR = 0.8 # Only plan to use this fraction of the currently available RAM
+# Rough single-core throughput in megapixels per second, used for runtime estimates only
+PLANNER_DECODE_MPIX_PER_SEC = 60
+PLANNER_PROCESS_MPIX_PER_SEC = 120
+PLANNER_ENCODE_MPIX_PER_SEC = 30
+# Bytes per pixel for common PIL modes (unknown modes are assumed to be 4)
+PLANNER_MODE_BYTES = {'1': 1, 'L': 1, 'P': 1, 'LA': 2, 'I;16': 2, 'RGB': 3, 'YCbCr': 3, 'LAB': 3,
+                      'HSV': 3, 'RGBA': 4, 'RGBX': 4, 'CMYK': 4, 'I': 4, 'F': 4}
+
+
+def _hash_file_content(path, chunk_size=1024 * 1024):
+    """Returns the SHA-256 hex digest of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_image_atomic(img, path):
+    """
+    Saves img to a temporary file next to path and moves it into place.
+    Replacing the directory entry (instead of rewriting the file in place)
+    never modifies a file that is hardlinked from the result cache.
+    """
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+    try:
+        img.save(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        # Don't leave a partial temporary file next to the user's output
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _link_or_copy(src, dst):
+    """
+    Hardlinks src to dst, falling back to a copy (e.g. across drives).
+    The link/copy is made under a temporary name and moved into place, so an
+    existing dst is left untouched if src is missing or unreadable.
+    """
+    root, ext = os.path.splitext(dst)
+    tmp_path = f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+    try:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _get_available_memory_bytes():
+    """Returns the currently available physical memory in bytes, or None if unknown."""
+    try:
+        import psutil # Optional dependency, most accurate when installed
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+
+    if os.name == "nt":
+        try:
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullAvailPhys
+        except (AttributeError, OSError):
+            pass
+        return None
+
+    # Linux: MemAvailable includes reclaimable page cache, unlike MemFree / SC_AVPHYS_PAGES
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024 # Reported in kB
+    except (OSError, ValueError, IndexError):
+        pass
+
+    # Last resort: free pages only, usually an underestimate (and unavailable on macOS)
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
 class ImageProcessorApp:
     def __init__(self, master):
         self.master = master
@@ -203,6 +330,13 @@ class ImageProcessorApp:
         self.notebook.add(self.splitting_tab, text="图片分散分割 (反色)")
         self.notebook.add(self.blending_tab, text="图片混合叠加")
 
+        # Memory budget (MB) shared by both tabs, used by the pre-flight planner
+        self.memory_budget_var = tk.StringVar(value="")
+
+        # (path, mtime, size) -> content hash, shared by the thumbnail worker and the result cache
+        self._content_hash_memo = {}
+        self._content_hash_lock = threading.Lock()
+
         # Setup UI for each tab
         self._setup_splitting_tab(self.splitting_tab)
         self._setup_blending_tab_with_scrolling(self.blending_tab)
@@ -248,6 +382,24 @@ class ImageProcessorApp:
         ttk.Radiobutton(fill_color_frame, text="黑色 (适合加亮混合)", variable=self.split_fill_color_var, value="black").pack(side=tk.LEFT, padx=10)
         ttk.Radiobutton(fill_color_frame, text="白色 (适合正片叠底混合)", variable=self.split_fill_color_var, value="white").pack(side=tk.LEFT, padx=10)
 
+        # Frame streaming options for animated GIF / multi-page TIFF inputs
+        self.split_all_frames_var = tk.BooleanVar(value=False)
+        self.split_per_frame_assignment_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="逐帧处理 (GIF 动图 / 多页 TIFF)", variable=self.split_all_frames_var).grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=8, padx=10)
+        ttk.Checkbutton(options_frame, text="每帧使用独立的随机分配", variable=self.split_per_frame_assignment_var).grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=8, padx=30)
+
+        ttk.Label(options_frame, text="内存预算 (MB，留空不限):").grid(row=3, column=0, sticky=tk.W, pady=8, padx=10)
+        ttk.Entry(options_frame, textvariable=self.memory_budget_var, width=12).grid(row=3, column=1, sticky=tk.W, pady=8, padx=10)
+
+        ttk.Label(options_frame, text="输出尺寸 (逗号分隔):").grid(row=4, column=0, sticky=tk.W, pady=8, padx=10)
+        self.split_sizes_entry = ttk.Entry(options_frame, width=30)
+        self.split_sizes_entry.insert(0, str(OUTPUT_SIZE))
+        self.split_sizes_entry.grid(row=4, column=1, sticky=tk.W, pady=8, padx=10)
+
+        ttk.Label(options_frame, text="随机种子 (留空为随机，填写后可复用缓存):").grid(row=5, column=0, sticky=tk.W, pady=8, padx=10)
+        self.split_seed_entry = ttk.Entry(options_frame, width=20)
+        self.split_seed_entry.grid(row=5, column=1, sticky=tk.W, pady=8, padx=10)
+
 
         # Apply TLabelframe style
         info_frame = ttk.LabelFrame(tab, text="说明", padding="15")
@@ -271,7 +423,7 @@ class ImageProcessorApp:
         """Open file dialog to select input image for splitting"""
         file_path = filedialog.askopenfilename(
             title="选择输入图片",
-            filetypes=(("图片文件", "*.png *.jpg *.jpeg *.bmp *.gif"), ("所有文件", "*.*"))
+            filetypes=(("图片文件", "*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff"), ("所有文件", "*.*"))
         )
         if file_path:
             self.split_input_entry.delete(0, tk.END)
@@ -307,91 +459,344 @@ class ImageProcessorApp:
              messagebox.showwarning("输入错误", "输出路径不是一个有效的文件夹。")
              return
 
+        output_sizes = self._parse_output_sizes(self.split_sizes_entry.get())
+        if output_sizes is None:
+            return
+        multi_resolution = output_sizes != [OUTPUT_SIZE]
+        all_frames = self.split_all_frames_var.get()
+        per_frame_assignment = self.split_per_frame_assignment_var.get()
+        if multi_resolution and all_frames:
+            messagebox.showwarning("输入错误", f"逐帧处理仅支持默认输出尺寸 {OUTPUT_SIZE}。")
+            return
+
+        seed_text = self.split_seed_entry.get().strip()
+        seed = None
+        if seed_text:
+            try:
+                seed = int(seed_text)
+            except ValueError:
+                messagebox.showwarning("输入错误", "随机种子必须是整数。")
+                return
+
+        # Only seeded runs are reproducible, so only they can be served from the cache
+        cache_key = None
+        if seed is not None:
+            try:
+                cache_key = self._result_cache_key("split", [self._get_content_hash(input_path)], {
+                    "fill_color": fill_color,
+                    "output_sizes": output_sizes,
+                    "block_size": SMALL_BLOCK_SIZE,
+                    "all_frames": all_frames,
+                    "per_frame_assignment": all_frames and per_frame_assignment,
+                    "seed": seed,
+                })
+            except OSError as e:
+                print(f"Warning: Result cache disabled for this run: {e}")
+            if cache_key and self._serve_split_from_cache(cache_key, output_dir):
+                return
+
+        # Estimate memory/runtime from the image header and pick an engine
+        candidates = self._plan_splitting(input_path, all_frames, output_sizes)
+        if candidates is None:
+            return
+        engine = self._choose_engine(candidates, "分割运行计划")
+        if engine is None:
+            return
+
         # Call the core processing function
-        self._process_image_random_scattered(input_path, output_dir, fill_color)
+        if engine == "frames":
+            written_files = self._process_frames_random_scattered(input_path, output_dir, fill_color,
+                                                                  per_frame_assignment, seed)
+        else:
+            written_files = self._process_image_random_scattered(input_path, output_dir, fill_color, engine, seed,
+                                                                 output_sizes if multi_resolution else None)
+
+        if cache_key and written_files:
+            self._result_cache_store(cache_key, output_dir, written_files)
+
+    def _parse_output_sizes(self, sizes_text):
+        """Parse the comma separated output sizes; returns a sorted list (largest first) or None on error"""
+        sizes = set()
+        for token in sizes_text.replace("，", ",").split(","):
+            token = token.strip()
+            if not token:
+                continue
+            try:
+                size = int(token)
+            except ValueError:
+                messagebox.showwarning("输入错误", f"无效的输出尺寸: {token}")
+                return None
+            if size <= 0 or size % SMALL_BLOCK_SIZE != 0:
+                messagebox.showwarning("输入错误", f"输出尺寸 {size} 必须是 {SMALL_BLOCK_SIZE} 的正整数倍。")
+                return None
+            sizes.add(size)
+
+        if not sizes:
+            return [OUTPUT_SIZE] # Empty entry keeps the default size
+        return sorted(sizes, reverse=True)
 
-    def _process_image_random_scattered(self, input_path, output_dir, fill_color_name):
+    def _prepare_inverted_image(self, source_img, fill_color_name, output_size=OUTPUT_SIZE):
         """
-        Processes the image: invert, split into many small blocks,
-        and randomly scatter blocks to 9 images, maintaining original position.
-        Updates the status label.
+        Flattens the source image to RGB (using the fill color behind any
+        transparency), resizes it to output_size x output_size and inverts it.
         """
-        self.split_status_label.config(text="状态: 正在处理...")
-        self.master.update_idletasks() # Update GUI immediately
+        # Ensure image mode is suitable before resizing/inverting
+        if source_img.mode == 'P' and 'transparency' in source_img.info:
+             # Palette images (e.g. GIF frames) keep transparency in the palette
+             source_img = source_img.convert('RGBA')
+        if source_img.mode == 'RGBA':
+             # Convert RGBA to RGB, using fill color as background
+             fill = (255, 255, 255) if fill_color_name == "white" else (0,0,0)
+             background = Image.new('RGB', source_img.size, fill)
+             background.paste(source_img, mask=source_img.split()[3]) # 3 is the alpha channel
+             source_img = background
+        elif source_img.mode != 'RGB':
+             source_img = source_img.convert('RGB')
+
+        # Use LANCZOS resampling for better quality
+        resized_img = source_img.resize((output_size, output_size), Image.Resampling.LANCZOS)
+
+        # Convert to RGB again just in case (should be RGB already)
+        if resized_img.mode != 'RGB':
+            resized_img = resized_img.convert('RGB')
+
+        return ImageOps.invert(resized_img)
+
+    def _generate_block_assignments(self, rng, n_blocks=N_BLOCKS):
+        """Returns a shuffled list mapping each small block to one of the 9 output images."""
+        assignments = [i % 9 for i in range(n_blocks)]
+        rng.shuffle(assignments)
+        return assignments
+
+    def _scale_block_assignments(self, assignments, source_grid_dim, target_grid_dim):
+        """
+        Maps an assignment made on a source_grid_dim grid onto a coarser
+        target_grid_dim grid: each target block takes the part of the source
+        block under its center, so the same region lands in the same part at
+        every size. This is only done where the geometry allows it: the source
+        grid must be an integer multiple of the target grid, and the scaled
+        assignment must still put blocks in all 9 parts. Returns None otherwise,
+        in which case the caller generates a fresh assignment for that grid.
+        """
+        if source_grid_dim % target_grid_dim != 0:
+            return None
 
-        try:
-            # 1. Read the image
-            original_img = Image.open(input_path)
+        scaled = []
+        for row in range(target_grid_dim):
+            source_row = (2 * row + 1) * source_grid_dim // (2 * target_grid_dim)
+            for col in range(target_grid_dim):
+                source_col = (2 * col + 1) * source_grid_dim // (2 * target_grid_dim)
+                scaled.append(assignments[source_row * source_grid_dim + source_col])
 
-            # 2. Adjust image size to OUTPUT_SIZE x OUTPUT_SIZE
-            # Ensure image mode is suitable before resizing/inverting
-            if original_img.mode == 'RGBA':
-                 # Convert RGBA to RGB, using fill color as background
-                 fill = (255, 255, 255) if fill_color_name == "white" else (0,0,0)
-                 background = Image.new('RGB', original_img.size, fill)
-                 background.paste(original_img, mask=original_img.split()[3]) # 3 is the alpha channel
-                 original_img = background
-            elif original_img.mode != 'RGB':
-                 original_img = original_img.convert('RGB')
+        if len(set(scaled)) < 9:
+            return None
+        return scaled
 
+    def _scatter_blocks(self, inverted_img, assignments, fill_color_rgb, grid_dim=GRID_DIM):
+        """
+        Splits the inverted image into small blocks and pastes each block into
+        its assigned output image at its original position. Returns the 9 output images.
+        """
+        output_size = grid_dim * SMALL_BLOCK_SIZE
+        output_images = []
+        for i in range(9):
+            new_img = Image.new('RGB', (output_size, output_size), fill_color_rgb)
+            output_images.append(new_img)
+
+        for row in range(grid_dim):
+            for col in range(grid_dim):
+                linear_index = row * grid_dim + col
+                output_img_index = assignments[linear_index]
+
+                x1 = col * SMALL_BLOCK_SIZE
+                y1 = row * SMALL_BLOCK_SIZE
+                x2 = x1 + SMALL_BLOCK_SIZE
+                y2 = y1 + SMALL_BLOCK_SIZE
+                block_box = (x1, y1, x2, y2)
+
+                cropped_block = inverted_img.crop(block_box)
+
+                paste_pos = (x1, y1)
+                output_images[output_img_index].paste(cropped_block, paste_pos)
+
+        return output_images
+
+    def _build_part(self, inverted_img, assignments, part_index, fill_color_rgb, grid_dim=GRID_DIM):
+        """Builds a single output image containing only the blocks assigned to part_index."""
+        output_size = grid_dim * SMALL_BLOCK_SIZE
+        part_img = Image.new('RGB', (output_size, output_size), fill_color_rgb)
+        for linear_index, output_img_index in enumerate(assignments):
+            if output_img_index != part_index:
+                continue
+            row, col = divmod(linear_index, grid_dim)
+            x1 = col * SMALL_BLOCK_SIZE
+            y1 = row * SMALL_BLOCK_SIZE
+            block_box = (x1, y1, x1 + SMALL_BLOCK_SIZE, y1 + SMALL_BLOCK_SIZE)
+            part_img.paste(inverted_img.crop(block_box), (x1, y1))
+        return part_img
+
+    def _save_level_parts(self, level_img, assignments, grid_dim, fill_color_rgb, output_dir, relative_dir, engine):
+        """
+        Splits one inverted image into its 9 parts and saves them as
+        output_dir/relative_dir/part_N.png. With engine="streaming" the parts
+        are built and saved one at a time instead of being held in memory
+        together. Returns the written file paths relative to output_dir.
+        """
+        os.makedirs(os.path.join(output_dir, relative_dir), exist_ok=True)
+
+        if engine == "streaming":
+            output_images = None # Built one at a time while saving
+        else:
+            output_images = self._scatter_blocks(level_img, assignments, fill_color_rgb, grid_dim)
+
+        written_files = []
+        for i in range(9):
+            output_filename = os.path.join(relative_dir, f"part_{i+1}.png")
+            output_path = os.path.join(output_dir, output_filename)
+            if output_images is None:
+                _save_image_atomic(self._build_part(level_img, assignments, i, fill_color_rgb, grid_dim), output_path)
+            else:
+                _save_image_atomic(output_images[i], output_path)
+            written_files.append(output_filename)
+            self.split_status_label.config(text=f"状态: 已保存 {output_filename}")
+            self.master.update_idletasks() # Update GUI immediately
+        return written_files
 
-            # Use LANCZOS resampling for better quality
-            resized_img = original_img.resize((OUTPUT_SIZE, OUTPUT_SIZE), Image.Resampling.LANCZOS)
+    def _process_image_random_scattered(self, input_path, output_dir, fill_color_name, engine="memory", seed=None,
+                                        output_sizes=None):
+        """
+        Processes the image: invert, split into many small blocks,
+        and randomly scatter blocks to 9 images, maintaining original position.
 
-            # 3. Convert to RGB again just in case (should be RGB from step 2)
-            if resized_img.mode != 'RGB':
-                resized_img = resized_img.convert('RGB')
+        If output_sizes is given, one set of 9 parts per size is written to
+        output_dir/size_XXXX. The source is decoded and inverted once at the
+        largest size; smaller sizes are resized down from the previous (next
+        larger) level, and reuse the largest grid's block assignment where
+        _scale_block_assignments allows it.
 
+        Updates the status label. Returns the written file paths relative to
+        output_dir, or None on error.
+        """
+        self.split_status_label.config(text="状态: 正在处理...")
+        self.master.update_idletasks() # Update GUI immediately
 
-            # 4. Invert colors
-            inverted_img = ImageOps.invert(resized_img)
+        multi_resolution = output_sizes is not None
+        output_sizes = sorted(output_sizes, reverse=True) if multi_resolution else [OUTPUT_SIZE]
 
-            # 5. Define fill color (already used for background in step 2 if RGBA)
+        try:
+            # 1. Read the image, flatten, resize to the largest size and invert colors (once)
+            with Image.open(input_path) as original_img:
+                level_img = self._prepare_inverted_image(original_img, fill_color_name, output_sizes[0])
+
+            # 2. Define fill color (already used for background in step 1 if RGBA)
             if fill_color_name == "black":
                 fill_color_rgb = (0, 0, 0)
             else: # white
                 fill_color_rgb = (255, 255, 255)
 
+            # 3. Generate random assignments of small blocks to output images on the largest grid
+            rng = random.Random(seed)
+            largest_grid_dim = output_sizes[0] // SMALL_BLOCK_SIZE
+            base_assignments = self._generate_block_assignments(rng, largest_grid_dim * largest_grid_dim)
 
-            # 6. Create 9 blank output images
-            output_images = []
-            for i in range(9):
-                new_img = Image.new('RGB', (OUTPUT_SIZE, OUTPUT_SIZE), fill_color_rgb)
-                output_images.append(new_img)
+            # 4. Create output directory if it doesn't exist, then split and save each size
+            os.makedirs(output_dir, exist_ok=True)
 
-            # 7. Generate random assignments of small blocks to output images
-            assignments = [i % 9 for i in range(N_BLOCKS)]
-            random.shuffle(assignments)
+            written_files = []
+            for output_size in output_sizes:
+                # Walk down the resize pyramid from the previous level
+                if level_img.width != output_size:
+                    level_img = level_img.resize((output_size, output_size), Image.Resampling.LANCZOS)
 
-            # 8. Split the inverted image into blocks and paste them
-            for row in range(GRID_DIM):
-                for col in range(GRID_DIM):
-                    linear_index = row * GRID_DIM + col
-                    output_img_index = assignments[linear_index]
+                grid_dim = output_size // SMALL_BLOCK_SIZE
+                if grid_dim == largest_grid_dim:
+                    assignments = base_assignments
+                else:
+                    assignments = self._scale_block_assignments(base_assignments, largest_grid_dim, grid_dim)
+                    if assignments is None:
+                        assignments = self._generate_block_assignments(rng, grid_dim * grid_dim)
 
-                    x1 = col * SMALL_BLOCK_SIZE
-                    y1 = row * SMALL_BLOCK_SIZE
-                    x2 = x1 + SMALL_BLOCK_SIZE
-                    y2 = y1 + SMALL_BLOCK_SIZE
-                    block_box = (x1, y1, x2, y2)
+                relative_dir = f"size_{output_size}" if multi_resolution else ""
+                written_files.extend(self._save_level_parts(level_img, assignments, grid_dim, fill_color_rgb,
+                                                            output_dir, relative_dir, engine))
 
-                    cropped_block = inverted_img.crop(block_box)
+            self.split_status_label.config(text="状态: 处理完成！")
+            done_text = "多尺寸分散分割已完成！" if multi_resolution else "图片分散分割已完成！"
+            messagebox.showinfo("完成", done_text + "\n文件保存在: " + output_dir)
+            return written_files
 
-                    paste_pos = (x1, y1)
-                    output_images[output_img_index].paste(cropped_block, paste_pos)
+        except FileNotFoundError:
+            self.split_status_label.config(text="状态: 错误 - 未找到文件")
+            messagebox.showerror("错误", "未找到输入的图片文件。")
+        except Exception as e:
+            self.split_status_label.config(text=f"状态: 错误 - {e}")
+            messagebox.showerror("处理错误", f"处理图片时发生错误: {e}")
+        finally:
+            # Ensure status is updated even on error
+             self.master.update_idletasks()
 
-            # 9. Create output directory if it doesn't exist and save images
-            os.makedirs(output_dir, exist_ok=True)
+    def _save_frame_parts(self, output_images, frame_dir):
+        """Saves one frame's 9 output images into frame_dir (runs on the encoder thread)."""
+        os.makedirs(frame_dir, exist_ok=True)
+        for i, output_img in enumerate(output_images):
+            _save_image_atomic(output_img, os.path.join(frame_dir, f"part_{i+1}.png"))
+
+    def _process_frames_random_scattered(self, input_path, output_dir, fill_color_name, per_frame_assignment, seed=None):
+        """
+        Streaming variant for animated (GIF) and multi-page (TIFF) inputs:
+        walks the frames one at a time and splits each frame into its own
+        set of 9 parts under output_dir/frame_XXXX. Only the current frame and
+        the previous frame's parts (being encoded in the background) are held
+        in memory at any time. Updates the status label. Returns the written
+        file paths relative to output_dir, or None on error.
+        """
+        self.split_status_label.config(text="状态: 正在逐帧处理...")
+        self.master.update_idletasks() # Update GUI immediately
+
+        fill_color_rgb = (0, 0, 0) if fill_color_name == "black" else (255, 255, 255)
 
-            for i in range(9):
-                output_filename = f"part_{i+1}.png"
-                output_path = os.path.join(output_dir, output_filename)
-                output_images[i].save(output_path)
-                self.split_status_label.config(text=f"状态: 已保存 {output_filename}")
-                self.master.update_idletasks() # Update GUI immediately
+        try:
+            with Image.open(input_path) as source_img:
+                n_frames = getattr(source_img, "n_frames", 1)
+                os.makedirs(output_dir, exist_ok=True)
+
+                # One shared assignment keeps every frame's parts consistent;
+                # a fresh one per frame is generated inside the loop if requested.
+                rng = random.Random(seed)
+                assignments = self._generate_block_assignments(rng)
+                pending_save = None
+                written_files = []
+
+                # Single encoder thread: PNG encoding of frame N overlaps with
+                # decoding/splitting of frame N+1, and waiting on the previous
+                # save before queuing the next bounds memory to two frames.
+                with ThreadPoolExecutor(max_workers=1) as encoder:
+                    for frame_index, frame in enumerate(ImageSequence.Iterator(source_img)):
+                        if per_frame_assignment and frame_index > 0:
+                            assignments = self._generate_block_assignments(rng)
+
+                        inverted_img = self._prepare_inverted_image(frame.copy(), fill_color_name)
+                        output_images = self._scatter_blocks(inverted_img, assignments, fill_color_rgb)
+                        del inverted_img
+
+                        if pending_save is not None:
+                            pending_save.result() # Re-raises any encoding error
+
+                        frame_dir_name = f"frame_{frame_index+1:04d}"
+                        pending_save = encoder.submit(self._save_frame_parts, output_images,
+                                                      os.path.join(output_dir, frame_dir_name))
+                        written_files.extend(os.path.join(frame_dir_name, f"part_{i+1}.png") for i in range(9))
+                        del output_images
+
+                        self.split_status_label.config(text=f"状态: 已处理第 {frame_index+1}/{n_frames} 帧")
+                        self.master.update_idletasks() # Update GUI immediately
+
+                    if pending_save is not None:
+                        pending_save.result()
 
             self.split_status_label.config(text="状态: 处理完成！")
-            messagebox.showinfo("完成", "图片分散分割已完成！\n文件保存在: " + output_dir)
+            messagebox.showinfo("完成", f"逐帧分散分割已完成！共 {n_frames} 帧\n文件保存在: " + output_dir)
+            return written_files
 
         except FileNotFoundError:
             self.split_status_label.config(text="状态: 错误 - 未找到文件")
@@ -409,6 +814,7 @@ class ImageProcessorApp:
         # Variables for Blending tab state (defined here as part of this tab's setup)
         self.blend_image_files = []
         self.blended_image = None
+        self.blend_result_cache_key = None # Cache key of the current blend result, if any
         self.blend_preview_canvas_image = None # Reference for the PhotoImage on the preview canvas
         self.blend_bg_mode = tk.StringVar(value="white")
         self.blend_invert_colors_var = tk.BooleanVar(value=False)
@@ -453,6 +859,8 @@ class ImageProcessorApp:
         self.blend_file_list_label = ttk.Label(file_frame, text="已选择图片：无", wraplength=700, justify=tk.LEFT)
         self.blend_file_list_label.pack(anchor=tk.W, pady=8, padx=10)
 
+        self._setup_blend_thumbnail_list(file_frame)
+
         # Blending Options Area - Apply TLabelframe style
         options_frame = ttk.LabelFrame(self.blend_scrollable_frame, text="混合选项", padding="15")
         options_frame.pack(pady=15, padx=20, fill="x")
@@ -471,6 +879,11 @@ class ImageProcessorApp:
         invert_checkbox = ttk.Checkbutton(options_frame, text="混合后反转颜色", variable=self.blend_invert_colors_var)
         invert_checkbox.pack(anchor="w", pady=10, padx=10)
 
+        budget_frame = ttk.Frame(options_frame)
+        budget_frame.pack(anchor="w", pady=8, padx=10)
+        ttk.Label(budget_frame, text="内存预算 (MB，留空不限):").pack(side="left")
+        ttk.Entry(budget_frame, textvariable=self.memory_budget_var, width=12).pack(side="left", padx=10)
+
         # Action Buttons Area - Apply TFrame style
         action_frame = ttk.Frame(self.blend_scrollable_frame, padding="10")
         action_frame.pack(pady=15, padx=20, fill="x")
@@ -543,28 +956,288 @@ class ImageProcessorApp:
         )
         if files:
             self.blend_image_files = list(files)
-            # Update label with selected filenames
-            # Limit the displayed filenames to prevent extremely long labels
-            display_limit = 8 # Display first 8 filenames, plus a summary if more
-            if len(self.blend_image_files) <= display_limit:
-                label_text = "已选择图片：\n" + "\n".join([os.path.basename(f) for f in self.blend_image_files])
-            else:
-                label_text = "已选择图片：\n" + "\n".join([os.path.basename(f) for f in self.blend_image_files[:display_limit]]) + \
-                             f"\n... 共 {len(self.blend_image_files)} 张图片"
-
-            self.blend_file_list_label.config(text=label_text)
-            self.blend_save_button.config(state=tk.DISABLED) # Disable save button when new files are selected
-            self.blend_preview_canvas.delete("all") # Clear preview canvas
-            self.blended_image = None
-            self.blend_preview_canvas_image = None # Clear reference
+            self._blend_thumb_selected_index = None
              # Author boryac
         else:
-            self.blend_file_list_label.config(text="已选择图片：无")
             self.blend_image_files = []
-            self.blend_save_button.config(state=tk.DISABLED)
-            self.blend_preview_canvas.delete("all")
-            self.blended_image = None
-            self.blend_preview_canvas_image = None
+            self._blend_thumb_selected_index = None
+
+        # A new selection retries files whose thumbnail failed before (they may have been fixed)
+        self._blend_thumb_failed.clear()
+
+        self._on_blend_file_list_changed()
+
+    def _update_blend_file_list_label(self):
+        """Update the label summarising the selected blend files"""
+        if not self.blend_image_files:
+            self.blend_file_list_label.config(text="已选择图片：无")
+            return
+
+        # Limit the displayed filenames to prevent extremely long labels
+        display_limit = 8 # Display first 8 filenames, plus a summary if more
+        if len(self.blend_image_files) <= display_limit:
+            label_text = "已选择图片：\n" + "\n".join([os.path.basename(f) for f in self.blend_image_files])
+        else:
+            label_text = "已选择图片：\n" + "\n".join([os.path.basename(f) for f in self.blend_image_files[:display_limit]]) + \
+                         f"\n... 共 {len(self.blend_image_files)} 张图片"
+
+        self.blend_file_list_label.config(text=label_text)
+
+    def _on_blend_file_list_changed(self):
+        """Refresh the label/thumbnail list and invalidate any previous blend result"""
+        self._update_blend_file_list_label()
+        self.blend_save_button.config(state=tk.DISABLED) # Disable save button when the file list changes
+        self.blend_preview_canvas.delete("all") # Clear preview canvas
+        self.blended_image = None
+        self.blend_result_cache_key = None
+        self.blend_preview_canvas_image = None # Clear reference
+
+        # Drop thumbnails of files that are no longer in the list
+        current_files = set(self.blend_image_files)
+        for path in list(self._blend_thumb_photos):
+            if path not in current_files:
+                del self._blend_thumb_photos[path]
+        self._blend_thumb_failed &= current_files
+
+        self._render_blend_thumbnail_rows()
+
+
+    # --- Blend File Thumbnail List (virtualized, decoded in background) ---
+    def _setup_blend_thumbnail_list(self, parent):
+        """Create the thumbnail list with its scrollbar and reorder/remove buttons"""
+        self._blend_thumb_photos = {} # path -> PhotoImage, only created on the UI thread
+        self._blend_thumb_pending = set() # paths queued for or being decoded
+        self._blend_thumb_failed = set() # paths whose thumbnail could not be created, not retried
+        self._blend_thumb_selected_index = None
+        self._blend_thumb_polling = False
+        self._blend_thumb_requests = queue.LifoQueue() # Most recently visible rows are decoded first
+        self._blend_thumb_results = queue.Queue()
+
+        list_frame = ttk.Frame(parent)
+        list_frame.pack(fill="x", pady=8, padx=10)
+
+        self.blend_thumb_canvas = tk.Canvas(list_frame, height=THUMBNAIL_LIST_HEIGHT, bg=NCM_WHITE_BG,
+                                            bd=1, relief="solid", highlightthickness=0)
+        self.blend_thumb_scrollbar = ttk.Scrollbar(list_frame, orient="vertical",
+                                                   command=self._on_blend_thumb_scroll, style="Vertical.TScrollbar")
+        self.blend_thumb_scrollbar.pack(side="right", fill="y")
+        self.blend_thumb_canvas.pack(side="left", fill="x", expand=True)
+        self.blend_thumb_canvas.config(yscrollcommand=self.blend_thumb_scrollbar.set)
+
+        self.blend_thumb_canvas.bind("<Configure>", lambda event: self._render_blend_thumbnail_rows())
+        self.blend_thumb_canvas.bind("<Button-1>", self._on_blend_thumb_click)
+        self.blend_thumb_canvas.bind("<MouseWheel>", self._on_blend_thumb_mousewheel)
+        self.blend_thumb_canvas.bind("<Button-4>", lambda event: self._on_blend_thumb_scroll("scroll", -1, "units"))
+        self.blend_thumb_canvas.bind("<Button-5>", lambda event: self._on_blend_thumb_scroll("scroll", 1, "units"))
+
+        button_frame = ttk.Frame(parent)
+        button_frame.pack(anchor=tk.W, pady=8, padx=10)
+        ttk.Button(button_frame, text="上移", command=lambda: self._move_selected_blend_file(-1)).pack(side="left", padx=(0, 10))
+        ttk.Button(button_frame, text="下移", command=lambda: self._move_selected_blend_file(1)).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="移除", command=self._remove_selected_blend_file).pack(side="left", padx=10)
+
+        # A single daemon worker decodes thumbnails so the UI thread never blocks on image IO
+        worker = threading.Thread(target=self._blend_thumbnail_worker, daemon=True)
+        worker.start()
+
+    def _on_blend_thumb_scroll(self, *args):
+        """Scroll the thumbnail list and render the rows that became visible"""
+        self.blend_thumb_canvas.yview(*args)
+        self._render_blend_thumbnail_rows()
+
+    def _on_blend_thumb_mousewheel(self, event):
+        """Scroll the thumbnail list with the mouse wheel (Windows/macOS)"""
+        self._on_blend_thumb_scroll("scroll", -1 if event.delta > 0 else 1, "units")
+        return "break" # Don't let the outer scrollable tab handle it as well
+
+    def _on_blend_thumb_click(self, event):
+        """Select the row under the mouse pointer"""
+        row = int(self.blend_thumb_canvas.canvasy(event.y) // THUMBNAIL_ROW_HEIGHT)
+        if 0 <= row < len(self.blend_image_files):
+            self._blend_thumb_selected_index = row
+            self._render_blend_thumbnail_rows()
+
+    def _render_blend_thumbnail_rows(self):
+        """Draw only the rows currently visible in the thumbnail list"""
+        canvas = self.blend_thumb_canvas
+        canvas_width = max(canvas.winfo_width(), 1)
+        canvas_height = canvas.winfo_height() or THUMBNAIL_LIST_HEIGHT
+        n_rows = len(self.blend_image_files)
+
+        canvas.config(scrollregion=(0, 0, canvas_width, max(n_rows * THUMBNAIL_ROW_HEIGHT, canvas_height)))
+        canvas.delete("all")
+
+        if n_rows == 0:
+            return
+
+        top = canvas.canvasy(0)
+        first_row = max(int(top // THUMBNAIL_ROW_HEIGHT), 0)
+        last_row = min(int((top + canvas_height) // THUMBNAIL_ROW_HEIGHT), n_rows - 1)
+
+        for row in range(first_row, last_row + 1):
+            path = self.blend_image_files[row]
+            y1 = row * THUMBNAIL_ROW_HEIGHT
+            y_center = y1 + THUMBNAIL_ROW_HEIGHT // 2
+
+            if row == self._blend_thumb_selected_index:
+                canvas.create_rectangle(0, y1, canvas_width, y1 + THUMBNAIL_ROW_HEIGHT,
+                                        fill=NCM_HOVER_BG, outline=NCM_RED_ACCENT)
+
+            photo = self._blend_thumb_photos.get(path)
+            if photo is not None:
+                canvas.create_image(6 + THUMBNAIL_SIZE // 2, y_center, image=photo)
+            elif path in self._blend_thumb_failed:
+                canvas.create_rectangle(6, y1 + 6, 6 + THUMBNAIL_SIZE, y1 + 6 + THUMBNAIL_SIZE,
+                                        fill=NCM_CANVAS_BG, outline=NCM_RED_ACCENT)
+                canvas.create_text(6 + THUMBNAIL_SIZE // 2, y_center, text="无法预览", fill=NCM_RED_ACCENT)
+            else:
+                canvas.create_rectangle(6, y1 + 6, 6 + THUMBNAIL_SIZE, y1 + 6 + THUMBNAIL_SIZE,
+                                        fill=NCM_CANVAS_BG, outline=NCM_BORDER_COLOR)
+                self._request_blend_thumbnail(path)
+
+            canvas.create_text(THUMBNAIL_SIZE + 20, y_center, anchor="w", fill=NCM_DARK_TEXT,
+                               text=f"{row + 1}. {os.path.basename(path)}",
+                               font=self.main_font if self.main_font else None)
+
+    def _request_blend_thumbnail(self, path):
+        """Queue a thumbnail decode for path unless one is already pending or has failed"""
+        if path in self._blend_thumb_pending or path in self._blend_thumb_failed:
+            return
+        self._blend_thumb_pending.add(path)
+        self._blend_thumb_requests.put(path)
+        if not self._blend_thumb_polling:
+            self._blend_thumb_polling = True
+            self.master.after(50, self._poll_blend_thumbnail_results)
+
+    def _poll_blend_thumbnail_results(self):
+        """Move decoded thumbnails from the worker onto the canvas (UI thread)"""
+        received = False
+        try:
+            while True:
+                path, thumb = self._blend_thumb_results.get_nowait()
+                self._blend_thumb_pending.discard(path)
+                if path not in self.blend_image_files:
+                    continue
+                if thumb is None:
+                    # Remember the failure so visible rows don't re-queue the decode on every render
+                    self._blend_thumb_failed.add(path)
+                else:
+                    self._blend_thumb_photos[path] = ImageTk.PhotoImage(thumb)
+                received = True
+        except queue.Empty:
+            pass
+
+        if received:
+            self._render_blend_thumbnail_rows()
+
+        if self._blend_thumb_pending:
+            self.master.after(50, self._poll_blend_thumbnail_results)
+        else:
+            self._blend_thumb_polling = False
+
+    def _blend_thumbnail_worker(self):
+        """Background thread: decode (or load from disk cache) one thumbnail at a time"""
+        cache_grew = False
+        while True:
+            path = self._blend_thumb_requests.get()
+            try:
+                thumb, created = self._load_or_create_thumbnail(path)
+                cache_grew = cache_grew or created
+            except Exception as e:
+                print(f"Warning: Failed to create thumbnail for {path}: {e}")
+                thumb = None
+            self._blend_thumb_results.put((path, thumb))
+
+            # Trim the disk cache once a batch of requests has been worked off
+            if cache_grew and self._blend_thumb_requests.empty():
+                self._evict_thumbnail_cache()
+                cache_grew = False
+
+    def _load_or_create_thumbnail(self, path):
+        """
+        Return (thumbnail, created) for path. Thumbnails are cached on disk by
+        content hash; created is True when a new cache file was written.
+        """
+        cache_path = os.path.join(THUMBNAIL_CACHE_DIR, f"{self._get_content_hash(path)}_{THUMBNAIL_SIZE}.png")
+
+        if os.path.exists(cache_path):
+            try:
+                os.utime(cache_path) # The file mtime is the LRU timestamp
+            except OSError:
+                pass
+            with Image.open(cache_path) as cached:
+                cached.load()
+                return cached.copy(), False
+
+        with Image.open(path) as source_img:
+            # draft() lets JPEG decode directly at a reduced scale instead of full resolution
+            source_img.draft("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            img = source_img
+            # LANCZOS resizing rejects modes like I;16 / I / F, convert those the way the blender does
+            if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+                img = img.convert("RGB")
+            img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+            thumb = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+
+        os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + f".{threading.get_ident()}.tmp"
+        thumb.save(tmp_path, format="PNG")
+        os.replace(tmp_path, cache_path)
+        return thumb, True
+
+    def _evict_thumbnail_cache(self):
+        """Delete least recently used thumbnails until the folder fits THUMBNAIL_CACHE_MAX_BYTES"""
+        entries = []
+        total_bytes = 0
+        try:
+            names = os.listdir(THUMBNAIL_CACHE_DIR)
+        except OSError:
+            return
+        for name in names:
+            file_path = os.path.join(THUMBNAIL_CACHE_DIR, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, file_path, stat.st_size))
+            total_bytes += stat.st_size
+
+        # Oldest first; leftover *.tmp files from an interrupted write count toward the cap too
+        for last_used, file_path, file_bytes in sorted(entries):
+            if total_bytes <= THUMBNAIL_CACHE_MAX_BYTES:
+                break
+            try:
+                os.remove(file_path)
+                total_bytes -= file_bytes
+            except OSError:
+                pass
+
+    def _move_selected_blend_file(self, offset):
+        """Move the selected file up (-1) or down (+1) in the blend order"""
+        index = self._blend_thumb_selected_index
+        if index is None:
+            return
+        new_index = index + offset
+        if not 0 <= new_index < len(self.blend_image_files):
+            return
+
+        files = self.blend_image_files
+        files[index], files[new_index] = files[new_index], files[index]
+        self._blend_thumb_selected_index = new_index
+        self._on_blend_file_list_changed()
+
+    def _remove_selected_blend_file(self):
+        """Remove the selected file from the blend list"""
+        index = self._blend_thumb_selected_index
+        if index is None or index >= len(self.blend_image_files):
+            return
+
+        del self.blend_image_files[index]
+        if not self.blend_image_files:
+            self._blend_thumb_selected_index = None
+        else:
+            self._blend_thumb_selected_index = min(index, len(self.blend_image_files) - 1)
+        self._on_blend_file_list_changed()
 
 
     def _blend_and_display(self):
@@ -584,8 +1257,36 @@ class ImageProcessorApp:
                                       text="正在混合...", fill=NCM_MEDIUM_TEXT, font=status_font) # Use themed color
             self.master.update_idletasks() # Update GUI immediately
 
+        # Identical ordered inputs with the same mode/invert flag are served from the result cache
+        self.blend_result_cache_key = None
+        try:
+            self.blend_result_cache_key = self._result_cache_key(
+                "blend", [self._get_content_hash(fpath) for fpath in self.blend_image_files], {
+                    "bg_mode": self.blend_bg_mode.get(),
+                    "invert": self.blend_invert_colors_var.get(),
+                })
+        except OSError as e:
+            print(f"Warning: Result cache disabled for this run: {e}")
+
+        cached_image = self._load_blend_from_cache(self.blend_result_cache_key)
+        if cached_image is not None:
+            self.blended_image = cached_image
+            self.blend_preview_canvas.delete("all") # Clear status text
+            self._display_blended_image_on_canvas(self.blended_image) # Display result on preview canvas
+            self.blend_save_button.config(state=tk.NORMAL) # Enable save button
+            return
+
+        # Estimate memory/runtime from the image headers and pick an engine
+        candidates = self._plan_blending()
+        engine = self._choose_engine(candidates, "混合运行计划") if candidates else None
+        if engine is None:
+            self.blend_preview_canvas.delete("all") # Clear status text
+            return
 
-        self.blended_image = self._perform_blending()
+        if engine == "streaming":
+            self.blended_image = self._perform_blending_streaming()
+        else:
+            self.blended_image = self._perform_blending()
 
         self.blend_preview_canvas.delete("all") # Clear status text
 
@@ -597,11 +1298,60 @@ class ImageProcessorApp:
 
             self._display_blended_image_on_canvas(self.blended_image) # Display result on preview canvas
             self.blend_save_button.config(state=tk.NORMAL) # Enable save button
+
+            # Encode the result into the cache in the background so the preview isn't delayed
+            if self.blend_result_cache_key:
+                threading.Thread(target=self._store_blend_in_cache,
+                                 args=(self.blend_result_cache_key, self.blended_image), daemon=True).start()
         else:
             messagebox.showerror("错误", "图片混合失败，请检查图片文件。")
 
+    def _load_blend_image(self, fpath):
+        """Load one image for blending and flatten it to RGB"""
+        img = Image.open(fpath)
+        # Ensure the image is in a mode compatible with blending (e.g., RGB)
+        # Convert RGBA to RGB, handling transparency
+        if img.mode == 'RGBA':
+            # Get blend background color for transparency handling
+            # Note: The actual blend is done on RGB images. The background color
+            # here is only used if an RGBA image needs to be flattened to RGB.
+            # The true blend background is used when creating the initial final_composite image.
+            temp_bg_color = (255, 255, 255) if self.blend_bg_mode.get() == "white" else (0, 0, 0)
+            background = Image.new('RGB', img.size, temp_bg_color)
+            # Use img.split()[-1] to get the alpha channel (last channel)
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != 'RGB':
+             img = img.convert('RGB')
+        return img
+
+    def _blend_into_composite(self, final_composite, img, is_first, max_width, max_height, bg_color):
+        """Pad img to the composite size and blend it onto the composite"""
+         # Authorboryac
+        temp_img_padded = Image.new('RGB', (max_width, max_height), bg_color)
+
+        # Calculate coordinates to paste the image centered on the temporary canvas
+        x_offset = (max_width - img.width) // 2
+        y_offset = (max_height - img.height) // 2
+
+        # Paste the current image onto the temporary canvas
+        temp_img_padded.paste(img, (x_offset, y_offset))
+
+        if is_first:
+            # The first image (padded) is the base
+            return temp_img_padded
+
+        # Blend subsequent images with the current composite
+        # ImageChops functions require images of the same size and mode
+        if self.blend_bg_mode.get() == "white":
+            # Multiply blend mode (suitable for white background)
+            return ImageChops.multiply(final_composite, temp_img_padded)
+        # Black background mode (Screen)
+        # Screen blend mode (suitable for black background)
+        return ImageChops.screen(final_composite, temp_img_padded)
+
     def _perform_blending(self):
-        """Core image blending logic"""
+        """Core image blending logic (in-memory engine: all images are loaded first)"""
         loaded_images = []
         max_width = 0
         max_height = 0
@@ -609,22 +1359,7 @@ class ImageProcessorApp:
         # Load all images and find maximum dimensions
         for fpath in self.blend_image_files:
             try:
-                img = Image.open(fpath)
-                # Ensure the image is in a mode compatible with blending (e.g., RGB)
-                # Convert RGBA to RGB, handling transparency
-                if img.mode == 'RGBA':
-                    # Get blend background color for transparency handling
-                    # Note: The actual blend is done on RGB images. The background color
-                    # here is only used if an RGBA image needs to be flattened to RGB.
-                    # The true blend background is used when creating the initial final_composite image.
-                    temp_bg_color = (255, 255, 255) if self.blend_bg_mode.get() == "white" else (0, 0, 0)
-                    background = Image.new('RGB', img.size, temp_bg_color)
-                    # Use img.split()[-1] to get the alpha channel (last channel)
-                    background.paste(img, mask=img.split()[-1])
-                    img = background
-                elif img.mode != 'RGB':
-                     img = img.convert('RGB')
-
+                img = self._load_blend_image(fpath)
                 loaded_images.append(img)
                 max_width = max(max_width, img.width)
                 max_height = max(max_height, img.height)
@@ -643,28 +1378,46 @@ class ImageProcessorApp:
 
         # Blend all loaded images
         for i, img in enumerate(loaded_images):
-             # Authorboryac
-            temp_img_padded = Image.new('RGB', (max_width, max_height), bg_color)
+            final_composite = self._blend_into_composite(final_composite, img, i == 0,
+                                                         max_width, max_height, bg_color)
+
+        return final_composite
 
-            # Calculate coordinates to paste the image centered on the temporary canvas
-            x_offset = (max_width - img.width) // 2
-            y_offset = (max_height - img.height) // 2
+    def _perform_blending_streaming(self):
+        """
+        Streaming blending engine: maximum dimensions are taken from the image
+        headers, then images are decoded and blended one at a time so only one
+        source image is held in memory alongside the composite.
+        """
+        max_width = 0
+        max_height = 0
 
-            # Paste the current image onto the temporary canvas
-            temp_img_padded.paste(img, (x_offset, y_offset))
+        # Header-only pass to find maximum dimensions (no pixel data is decoded)
+        for fpath in self.blend_image_files:
+            try:
+                with Image.open(fpath) as img:
+                    max_width = max(max_width, img.width)
+                    max_height = max(max_height, img.height)
+            except Exception as e:
+                messagebox.showerror("错误", f"无法加载图片: {os.path.basename(fpath)}\n错误信息: {e}")
+                return None
 
-            if i == 0:
-                # The first image (padded) is the base
-                 final_composite = temp_img_padded
-            else:
-                # Blend subsequent images with the current composite
-                # ImageChops functions require images of the same size and mode
-                if self.blend_bg_mode.get() == "white":
-                    # Multiply blend mode (suitable for white background)
-                    final_composite = ImageChops.multiply(final_composite, temp_img_padded)
-                else: # Black background mode (Screen)
-                    # Screen blend mode (suitable for black background)
-                    final_composite = ImageChops.screen(final_composite, temp_img_padded)
+        if not self.blend_image_files:
+            return None
+
+        # Set background color based on selected mode for the composite image
+        bg_color = (255, 255, 255) if self.blend_bg_mode.get() == "white" else (0, 0, 0)
+        final_composite = Image.new('RGB', (max_width, max_height), bg_color)
+
+        for i, fpath in enumerate(self.blend_image_files):
+            try:
+                img = self._load_blend_image(fpath)
+            except Exception as e:
+                messagebox.showerror("错误", f"无法加载图片: {os.path.basename(fpath)}\n错误信息: {e}")
+                return None
+            final_composite = self._blend_into_composite(final_composite, img, i == 0,
+                                                         max_width, max_height, bg_color)
+            del img # Release the decoded source before loading the next one
 
         return final_composite
 
@@ -759,7 +1512,12 @@ class ImageProcessorApp:
                     if not os.path.splitext(save_path)[1]:
                         save_path += ".png"
 
-                    img_to_save.save(save_path)
+                    # A cached PNG of this exact result can be linked instead of re-encoded
+                    cached_path = self._blend_cache_result_path(self.blend_result_cache_key)
+                    if cached_path and os.path.splitext(save_path)[1].lower() == ".png":
+                        _link_or_copy(cached_path, save_path)
+                    else:
+                        _save_image_atomic(img_to_save, save_path)
                     messagebox.showinfo("成功", f"图片已保存到:\n{save_path}")
                 except Exception as e:
                     messagebox.showerror("保存失败", f"保存图片时发生错误:\n{e}")
@@ -767,6 +1525,332 @@ class ImageProcessorApp:
             messagebox.showwarning("警告", "没有图片可保存，请先混合图片。")
 
 
+    # --- Content-addressed Result Cache ---
+    def _get_content_hash(self, path):
+        """Content hash of path, memoized by (path, mtime, size); safe to call from worker threads"""
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._content_hash_lock:
+            cached = self._content_hash_memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        digest = _hash_file_content(path)
+        with self._content_hash_lock:
+            self._content_hash_memo[memo_key] = digest
+        return digest
+
+    def _result_cache_key(self, kind, input_hashes, params):
+        """Build the cache key from the operation, ordered input content hashes and parameters"""
+        payload = json.dumps({
+            "version": RESULT_CACHE_VERSION,
+            "kind": kind,
+            "inputs": input_hashes,
+            "params": params,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _result_cache_lookup(self, cache_key):
+        """Return the entry folder for cache_key and mark it as recently used, or None on a miss"""
+        if not cache_key:
+            return None
+        entry_dir = os.path.join(RESULT_CACHE_DIR, cache_key)
+        if not os.path.isdir(entry_dir):
+            return None
+        try:
+            os.utime(entry_dir) # The folder mtime is the LRU timestamp
+        except OSError:
+            pass
+        return entry_dir
+
+    def _result_cache_store(self, cache_key, source_dir, relative_paths):
+        """
+        Store the given output files under cache_key (hardlinked where possible).
+        The entry is assembled in a staging folder and renamed into place, so
+        readers never see a partial entry. Evicts old entries afterwards.
+        """
+        entry_dir = os.path.join(RESULT_CACHE_DIR, cache_key)
+        staging_dir = os.path.join(RESULT_CACHE_DIR, f".staging-{cache_key}-{os.getpid()}-{threading.get_ident()}")
+        try:
+            for relative_path in relative_paths:
+                target_path = os.path.join(staging_dir, relative_path)
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                _link_or_copy(os.path.join(source_dir, relative_path), target_path)
+            os.rename(staging_dir, entry_dir)
+        except OSError as e:
+            # Another run stored the same entry first, or the cache is not writable
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            if not os.path.isdir(entry_dir):
+                print(f"Warning: Failed to store result in cache: {e}")
+            return
+        self._evict_result_cache(keep_key=cache_key)
+
+    def _evict_result_cache(self, keep_key=None):
+        """
+        Delete least recently used entries until the cache fits RESULT_CACHE_MAX_BYTES.
+        Staging/encoding folders (names starting with ".") count toward the cap;
+        those untouched for RESULT_CACHE_STALE_SECONDS were left behind by an
+        interrupted run and are deleted.
+        """
+        entries = []
+        total_bytes = 0
+        now = time.time()
+        try:
+            names = os.listdir(RESULT_CACHE_DIR)
+        except OSError:
+            return
+        for name in names:
+            entry_dir = os.path.join(RESULT_CACHE_DIR, name)
+            if not os.path.isdir(entry_dir):
+                continue
+            entry_bytes = 0
+            try:
+                last_used = os.path.getmtime(entry_dir)
+            except OSError:
+                continue
+            newest_write = last_used
+            for dir_path, _, file_names in os.walk(entry_dir):
+                for file_name in file_names:
+                    try:
+                        stat = os.stat(os.path.join(dir_path, file_name))
+                    except OSError:
+                        continue
+                    entry_bytes += stat.st_size
+                    newest_write = max(newest_write, stat.st_mtime)
+
+            if name.startswith("."):
+                # In-progress folders are never evicted, only abandoned ones
+                if now - newest_write > RESULT_CACHE_STALE_SECONDS:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                else:
+                    total_bytes += entry_bytes
+                continue
+
+            entries.append((last_used, name, entry_bytes))
+            total_bytes += entry_bytes
+
+        for last_used, name, entry_bytes in sorted(entries):
+            if total_bytes <= RESULT_CACHE_MAX_BYTES:
+                break
+            if name == keep_key:
+                continue
+            shutil.rmtree(os.path.join(RESULT_CACHE_DIR, name), ignore_errors=True)
+            total_bytes -= entry_bytes
+
+    def _serve_split_from_cache(self, cache_key, output_dir):
+        """Link a cached split result into output_dir; returns True on a cache hit"""
+        entry_dir = self._result_cache_lookup(cache_key)
+        if entry_dir is None:
+            return False
+
+        try:
+            for dir_path, _, file_names in os.walk(entry_dir):
+                relative_dir = os.path.relpath(dir_path, entry_dir)
+                target_dir = os.path.normpath(os.path.join(output_dir, relative_dir))
+                os.makedirs(target_dir, exist_ok=True)
+                for file_name in file_names:
+                    _link_or_copy(os.path.join(dir_path, file_name), os.path.join(target_dir, file_name))
+        except OSError as e:
+            # Fall back to recomputing if the cached files can't be served
+            print(f"Warning: Failed to serve result from cache: {e}")
+            return False
+
+        self.split_status_label.config(text="状态: 处理完成！(来自缓存)")
+        messagebox.showinfo("完成", "已从缓存输出相同参数的分割结果！\n文件保存在: " + output_dir)
+        return True
+
+    def _blend_cache_result_path(self, cache_key):
+        """Path of the cached blend result PNG for cache_key, or None on a miss"""
+        entry_dir = self._result_cache_lookup(cache_key)
+        if entry_dir is None:
+            return None
+        result_path = os.path.join(entry_dir, "result.png")
+        return result_path if os.path.exists(result_path) else None
+
+    def _load_blend_from_cache(self, cache_key):
+        """Load a cached blend result as an RGB image, or None on a miss"""
+        result_path = self._blend_cache_result_path(cache_key)
+        if result_path is None:
+            return None
+        try:
+            with Image.open(result_path) as cached:
+                return cached.convert('RGB')
+        except Exception as e:
+            print(f"Warning: Failed to load blend result from cache: {e}")
+            return None
+
+    def _store_blend_in_cache(self, cache_key, image):
+        """Encode a blend result into the cache (runs on a background thread)"""
+        encode_dir = os.path.join(RESULT_CACHE_DIR, f".encoding-{cache_key}-{os.getpid()}-{threading.get_ident()}")
+        try:
+            os.makedirs(encode_dir, exist_ok=True)
+            image.save(os.path.join(encode_dir, "result.png"))
+            self._result_cache_store(cache_key, encode_dir, ["result.png"])
+        except Exception as e:
+            print(f"Warning: Failed to store blend result in cache: {e}")
+        finally:
+            shutil.rmtree(encode_dir, ignore_errors=True)
+
+
+    # --- Pre-flight Memory Planner ---
+    def _read_image_header(self, path):
+        """Read only the header of an image: returns (width, height, bytes_per_pixel, n_frames)"""
+        with Image.open(path) as img:
+            return (img.width, img.height, PLANNER_MODE_BYTES.get(img.mode, 4),
+                    getattr(img, "n_frames", 1))
+
+    def _get_memory_budget_bytes(self):
+        """Return the user memory budget in bytes, or None if not set. Raises ValueError if invalid"""
+        budget_text = self.memory_budget_var.get().strip()
+        if not budget_text:
+            return None
+        try:
+            budget_mb = float(budget_text)
+        except ValueError:
+            raise ValueError(f"无效的内存预算: {budget_text}")
+        if not math.isfinite(budget_mb) or budget_mb <= 0:
+            raise ValueError(f"内存预算必须是有限的正数 (MB): {budget_text}")
+        return int(budget_mb * 1024 * 1024)
+
+    def _plan_splitting(self, input_path, all_frames, output_sizes=(OUTPUT_SIZE,)):
+        """
+        Estimate peak memory and runtime of each splitting engine from the
+        image header. Returns a list of candidate dicts, or None on error.
+        """
+        try:
+            width, height, source_bpp, n_frames = self._read_image_header(input_path)
+        except Exception as e:
+            messagebox.showerror("错误", f"无法读取图片信息: {os.path.basename(input_path)}\n错误信息: {e}")
+            return None
+
+        source_pixels = width * height
+        # Peak memory is set by the largest size; smaller pyramid levels come after it
+        output_pixels = max(output_sizes) ** 2
+        total_output_pixels = sum(size * size for size in output_sizes)
+        # Decoded source + RGB flattened copy
+        source_bytes = source_pixels * (source_bpp + 3)
+        # Decode once + resize/invert/scatter per size + PNG encode of the 9 parts per size
+        frame_seconds = (source_pixels / 1e6 / PLANNER_DECODE_MPIX_PER_SEC
+                         + 3 * total_output_pixels / 1e6 / PLANNER_PROCESS_MPIX_PER_SEC
+                         + 9 * total_output_pixels / 1e6 / PLANNER_ENCODE_MPIX_PER_SEC)
+
+        if all_frames:
+            # Current frame (resized + inverted + 9 parts) plus the previous
+            # frame's 9 parts still being encoded in the background
+            return [{
+                "engine": "frames",
+                "name": "逐帧流式",
+                "peak_bytes": source_bytes + (2 + 9 + 9) * output_pixels * 3,
+                "seconds": frame_seconds * n_frames,
+            }]
+
+        return [
+            {
+                # Resized + inverted + all 9 parts held at once
+                "engine": "memory",
+                "name": "内存一次性",
+                "peak_bytes": source_bytes + (2 + 9) * output_pixels * 3,
+                "seconds": frame_seconds,
+            },
+            {
+                # Resized + inverted + one part at a time (extra pass over the grid per part)
+                "engine": "streaming",
+                "name": "流式逐张输出",
+                "peak_bytes": source_bytes + (2 + 1) * output_pixels * 3,
+                "seconds": frame_seconds * 1.1,
+            },
+        ]
+
+    def _plan_blending(self):
+        """
+        Estimate peak memory and runtime of each blending engine from the
+        image headers. Returns a list of candidate dicts, or None on error.
+        """
+        headers = []
+        for fpath in self.blend_image_files:
+            try:
+                headers.append(self._read_image_header(fpath))
+            except Exception as e:
+                messagebox.showerror("错误", f"无法读取图片信息: {os.path.basename(fpath)}\n错误信息: {e}")
+                return None
+
+        max_width = max(h[0] for h in headers)
+        max_height = max(h[1] for h in headers)
+        composite_bytes = max_width * max_height * 3
+        # Each source: decoded pixels + RGB flattened copy
+        source_bytes = [w * h * (bpp + 3) for w, h, bpp, _ in headers]
+        loaded_rgb_bytes = sum(w * h * 3 for w, h, _, _ in headers)
+
+        seconds = (sum(w * h for w, h, _, _ in headers) / 1e6 / PLANNER_DECODE_MPIX_PER_SEC
+                   + 2 * len(headers) * max_width * max_height / 1e6 / PLANNER_PROCESS_MPIX_PER_SEC)
+
+        return [
+            {
+                # All flattened sources held at once + composite, padded copy and blend result
+                "engine": "memory",
+                "name": "内存一次性",
+                "peak_bytes": loaded_rgb_bytes + max(source_bytes) + 3 * composite_bytes,
+                "seconds": seconds,
+            },
+            {
+                # One source at a time + composite, padded copy and blend result
+                "engine": "streaming",
+                "name": "流式逐张混合",
+                "peak_bytes": max(source_bytes) + 3 * composite_bytes,
+                "seconds": seconds * 1.05,
+            },
+        ]
+
+    def _choose_engine(self, candidates, title):
+        """
+        Pick the fastest engine whose estimated peak memory fits both the
+        available RAM and the user budget, show the plan and ask to confirm.
+        Returns the chosen engine key, or None if the user cancelled or the
+        memory budget is invalid.
+        """
+        try:
+            budget = self._get_memory_budget_bytes()
+        except ValueError as e:
+            messagebox.showwarning("输入错误", str(e))
+            return None
+        available = _get_available_memory_bytes()
+
+        limits = []
+        if available is not None:
+            limits.append(int(available * PLANNER_RAM_SAFETY_FACTOR))
+        if budget is not None:
+            limits.append(budget)
+        limit = min(limits) if limits else None
+
+        fitting = [c for c in candidates if limit is None or c["peak_bytes"] <= limit]
+        if fitting:
+            chosen = min(fitting, key=lambda c: c["seconds"])
+        else:
+            # Nothing fits: fall back to the engine with the smallest footprint
+            chosen = min(candidates, key=lambda c: c["peak_bytes"])
+
+        def format_mb(n_bytes):
+            return f"{n_bytes / (1024 * 1024):.0f} MB"
+
+        lines = []
+        for c in candidates:
+            marker = "→ " if c is chosen else "   "
+            lines.append(f"{marker}{c['name']}: 峰值内存约 {format_mb(c['peak_bytes'])}，耗时约 {c['seconds']:.1f} 秒")
+        lines.append("")
+        lines.append(f"可用内存: {format_mb(available) if available is not None else '未知'}")
+        lines.append(f"内存预算: {format_mb(budget) if budget is not None else '不限'}")
+
+        if fitting:
+            lines.append(f"\n将使用「{chosen['name']}」引擎，是否继续？")
+            proceed = messagebox.askokcancel(title, "\n".join(lines))
+        else:
+            lines.append("\n警告: 没有引擎能在内存限制内运行，继续可能导致内存不足或系统变慢。")
+            lines.append(f"是否仍使用「{chosen['name']}」引擎继续？")
+            proceed = messagebox.askyesno(title, "\n".join(lines), icon="warning")
+
+        return chosen["engine"] if proceed else None
+
+
  # Author boryac
 if __name__ == "__main__":
     root = tk.Tk()